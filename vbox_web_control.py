@@ -1,62 +1,89 @@
 #!/usr/bin/env python3
 import argparse
+import concurrent.futures
+import contextlib
+import functools
+import glob
+import gzip
+import hashlib
 import http.server
+import io
 import urllib.parse
 import subprocess
+import tempfile
 import os
 import json
 import re
+import select
 import socket  # Needed for error checking in run_server
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import signal  # Import signal for handling termination signals
+import threading
+import time
+
+try:
+    import vboxapi  # Optional: VirtualBox SDK Python bindings for in-process API access
+except ImportError:
+    vboxapi = None
+
+# Sanity check for VM names taken from requests. Arguments are passed as a list, so only a leading "-"
+# (parsed as a VBoxManage option), control characters and empty or over-long names are rejected.
+_VM_NAME_OK = re.compile(r'[^\x00-\x1f\x7f-][^\x00-\x1f\x7f]{0,255}\Z')
 
 # Mapping of characters to their corresponding keyboard scancodes.
 KEYCODES = {
-    'a': '1e', 'b': '30', 'c': '2e', 'd': '20', 'e': '12',
-    'f': '21', 'g': '22', 'h': '23', 'i': '17', 'j': '24',
-    'k': '25', 'l': '26', 'm': '32', 'n': '31', 'o': '18',
-    'p': '19', 'q': '10', 'r': '13', 's': '1f', 't': '14',
-    'u': '16', 'v': '2f', 'w': '11', 'x': '2d', 'y': '15',
-    'z': '2c',
-    '0': '0b', '1': '02', '2': '03', '3': '04', '4': '05',
-    '5': '06', '6': '07', '7': '08', '8': '09', '9': '0a',
-    ' ': '39',
-    '-': '0c', '=': '0d', '[': '1a', ']': '1b', '\\': '2b',
-    ';': '27', '\'': '28', '`': '29', ',': '33', '.': '34', '/': '35',
-    '!': '02', '@': '03', '#': '04', '$': '05', '%': '06', '^': '07',
-    '&': '08', '*': '09', '(': '0a', ')': '0b', '_': '0c', '+': '0d',
-    '{': '1a', '}': '1b', '|': '2b', ':': '27', '"': '28', '~': '29',
-    '<': '33', '>': '34', '?': '35'
+    'a': 0x1e, 'b': 0x30, 'c': 0x2e, 'd': 0x20, 'e': 0x12,
+    'f': 0x21, 'g': 0x22, 'h': 0x23, 'i': 0x17, 'j': 0x24,
+    'k': 0x25, 'l': 0x26, 'm': 0x32, 'n': 0x31, 'o': 0x18,
+    'p': 0x19, 'q': 0x10, 'r': 0x13, 's': 0x1f, 't': 0x14,
+    'u': 0x16, 'v': 0x2f, 'w': 0x11, 'x': 0x2d, 'y': 0x15,
+    'z': 0x2c,
+    '0': 0x0b, '1': 0x02, '2': 0x03, '3': 0x04, '4': 0x05,
+    '5': 0x06, '6': 0x07, '7': 0x08, '8': 0x09, '9': 0x0a,
+    ' ': 0x39,
+    '-': 0x0c, '=': 0x0d, '[': 0x1a, ']': 0x1b, '\\': 0x2b,
+    ';': 0x27, '\'': 0x28, '`': 0x29, ',': 0x33, '.': 0x34, '/': 0x35,
+    '!': 0x02, '@': 0x03, '#': 0x04, '$': 0x05, '%': 0x06, '^': 0x07,
+    '&': 0x08, '*': 0x09, '(': 0x0a, ')': 0x0b, '_': 0x0c, '+': 0x0d,
+    '{': 0x1a, '}': 0x1b, '|': 0x2b, ':': 0x27, '"': 0x28, '~': 0x29,
+    '<': 0x33, '>': 0x34, '?': 0x35
 }
 
 # Scancode sequences for special keys.
 SPECIAL_KEYCODES = {
-    "backspace": ["0e", "8e"],
-    "insert": ["e0", "52", "e0", "d2"],
-    "home": ["e0", "47", "e0", "c7"],
-    "end": ["e0", "4f", "e0", "cf"],
-    "pageup": ["e0", "49", "e0", "c9"],
-    "pagedown": ["e0", "51", "e0", "d1"],
-    "left": ["e0", "4b", "e0", "cb"],
-    "right": ["e0", "4d", "e0", "cd"],
-    "up": ["e0", "48", "e0", "c8"],
-    "down": ["e0", "50", "e0", "d0"],
-    "ctrl": ["1d", "9d"],
-    "strg": ["1d", "9d"],
-    "shift": ["2a", "aa"],
-    "alt": ["38", "b8"],
-    "win": ["e0", "5b", "e0", "db"],
-    "windows": ["e0", "5b", "e0", "db"],
-    "esc": ["01", "81"],
-    "escape": ["01", "81"],
-    "enter": ["1c", "9c"],
-    "return": ["1c", "9c"],
-    "tab": ["0f", "8f"],
-    "capslock": ["3a", "ba"],
-    "f1": ["3b", "bb"], "f2": ["3c", "bc"], "f3": ["3d", "bd"], "f4": ["3e", "be"],
-    "f5": ["3f", "bf"], "f6": ["40", "c0"], "f7": ["41", "c1"], "f8": ["42", "c2"],
-    "f9": ["43", "c3"], "f10": ["44", "c4"], "f11": ["57", "d7"], "f12": ["58", "d8"],
-    "del": ["53", "d3"], "delete": ["53", "d3"]
+    "backspace": (0x0e, 0x8e),
+    "insert": (0xe0, 0x52, 0xe0, 0xd2),
+    "home": (0xe0, 0x47, 0xe0, 0xc7),
+    "end": (0xe0, 0x4f, 0xe0, 0xcf),
+    "pageup": (0xe0, 0x49, 0xe0, 0xc9),
+    "pagedown": (0xe0, 0x51, 0xe0, 0xd1),
+    "left": (0xe0, 0x4b, 0xe0, 0xcb),
+    "right": (0xe0, 0x4d, 0xe0, 0xcd),
+    "up": (0xe0, 0x48, 0xe0, 0xc8),
+    "down": (0xe0, 0x50, 0xe0, 0xd0),
+    "ctrl": (0x1d, 0x9d),
+    "strg": (0x1d, 0x9d),
+    "shift": (0x2a, 0xaa),
+    "alt": (0x38, 0xb8),
+    "win": (0xe0, 0x5b, 0xe0, 0xdb),
+    "windows": (0xe0, 0x5b, 0xe0, 0xdb),
+    "esc": (0x01, 0x81),
+    "escape": (0x01, 0x81),
+    "enter": (0x1c, 0x9c),
+    "return": (0x1c, 0x9c),
+    "tab": (0x0f, 0x8f),
+    "capslock": (0x3a, 0xba),
+    "f1": (0x3b, 0xbb), "f2": (0x3c, 0xbc), "f3": (0x3d, 0xbd), "f4": (0x3e, 0xbe),
+    "f5": (0x3f, 0xbf), "f6": (0x40, 0xc0), "f7": (0x41, 0xc1), "f8": (0x42, 0xc2),
+    "f9": (0x43, 0xc3), "f10": (0x44, 0xc4), "f11": (0x57, 0xd7), "f12": (0x58, 0xd8),
+    "del": (0x53, 0xd3), "delete": (0x53, 0xd3)
+}
+
+# Special-key sequences keyed by the raw "<name>" token, including common capitalizations.
+_SPECIAL_BY_TOKEN = {
+    f"<{variant}>": codes
+    for name, codes in SPECIAL_KEYCODES.items()
+    for variant in (name, name.upper(), name.capitalize())
 }
 
 # Mapping for characters that require the Shift modifier.
@@ -64,11 +91,30 @@ SHIFT_REQUIRED = {
     '!': '1', '@': '2', '#': '3', '$': '4', '%': '5', '^': '6',
     '&': '7', '*': '8', '(': '9', ')': '0',
     '_': '-', '+': '=', '{': '[', '}': ']', '|': '\\',
-    ':': ';', '"': '28', '~': '29', '<': '33', '>': '34', '?': '35'
+    ':': ';', '"': '\'', '~': '`', '<': ',', '>': '.', '?': '/'
 }
 SHIFT_REQUIRED.update({chr(c): chr(c).lower() for c in range(ord('A'), ord('Z') + 1)})
 
-def text_to_scancodes(text: str) -> List[str]:
+# Precomputed (press, release) scancode pairs for every unshifted character.
+KEYCODES_PAIRS = {ch: (sc, sc | 0x80) for ch, sc in KEYCODES.items()}
+
+# Precomputed Shift-wrapped sequences for characters that require the Shift modifier.
+SHIFTED_PAIRS = {
+    ch: (0x2a,) + KEYCODES_PAIRS[base] + (0xaa,)
+    for ch, base in SHIFT_REQUIRED.items()
+    if base in KEYCODES_PAIRS
+}
+
+# Final scancode sequence for every supported character.
+CHAR_TO_SCANCODES = {**KEYCODES_PAIRS, **SHIFTED_PAIRS}
+
+# ASCII lookup table indexed by ord(ch); unsupported characters map to an empty tuple.
+_SCAN_TABLE = [()] * 128
+for _ch, _codes in CHAR_TO_SCANCODES.items():
+    _SCAN_TABLE[ord(_ch)] = _codes
+del _ch, _codes
+
+def text_to_scancodes(text: str) -> List[int]:
     """
     Converts a given text string into a sequence of keyboard scancodes.
     If a character requires the Shift modifier, the necessary scancodes are added.
@@ -77,58 +123,198 @@ def text_to_scancodes(text: str) -> List[str]:
         text (str): The input text to convert.
 
     Returns:
-        List[str]: A list of scancodes representing the input text.
+        List[int]: A list of scancodes representing the input text.
     """
     codes = []
+    extend = codes.extend
+    table = _SCAN_TABLE
     for ch in text:
-        if ch in SHIFT_REQUIRED:
-            base = SHIFT_REQUIRED[ch]
-            if base not in KEYCODES:
-                continue
-            sc = KEYCODES[base]
-            codes.extend(["2a", sc, format(int(sc, 16) + 0x80, 'x'), "aa"])
-        elif ch.isupper():
-            lower = ch.lower()
-            if lower not in KEYCODES:
-                continue
-            sc = KEYCODES[lower]
-            codes.extend(["2a", sc, format(int(sc, 16) + 0x80, 'x'), "aa"])
-        elif ch in KEYCODES:
-            sc = KEYCODES[ch]
-            codes.extend([sc, format(int(sc, 16) + 0x80, 'x')])
-        else:
-            continue
+        o = ord(ch)
+        if o < 128:
+            extend(table[o])
     return codes
 
-def parse_keys_input(input_str: str) -> List[str]:
+# Longest keystroke input or text fragment that is memoized; longer pastes are rarely
+# repeated, so caching them would only cost memory.
+PARSE_CACHE_MAX_LENGTH = 64
+
+@functools.lru_cache(maxsize=4096)
+def _text_to_scancodes_cached(text: str) -> Tuple[int, ...]:
+    """
+    Memoized `text_to_scancodes` for text fragments that are typed repeatedly (e.g. "ls", "cd ").
+    """
+    return tuple(text_to_scancodes(text))
+
+def _fragment_scancodes(text: str) -> Iterable[int]:
+    """
+    Converts a text fragment, serving short fragments from the cache.
+    """
+    if len(text) <= PARSE_CACHE_MAX_LENGTH:
+        return _text_to_scancodes_cached(text)
+    return text_to_scancodes(text)
+
+def parse_keys_input(input_str: str) -> Tuple[int, ...]:
     """
     Parses a string containing tokens (e.g., <enter>, <ctrl>) and converts regular text to scancodes.
+    Short inputs are cached, since clients resend the same ones (e.g. <enter>, <backspace>) constantly.
 
     Args:
         input_str (str): The input string containing tokens and/or text.
 
     Returns:
-        List[str]: A list of scancodes representing the input string.
+        Tuple[int, ...]: The scancodes representing the input string.
+    """
+    if len(input_str) <= PARSE_CACHE_MAX_LENGTH:
+        return _parse_keys_input_cached(input_str)
+    return _parse_keys_input(input_str)
+
+def _parse_keys_input(input_str: str) -> Tuple[int, ...]:
+    """
+    Uncached implementation of `parse_keys_input`.
     """
-    tokens = re.split(r'(<[^>]+>)', input_str)
     codes = []
-    for token in tokens:
-        if not token:
+    special = _SPECIAL_BY_TOKEN
+    i, n = 0, len(input_str)
+    # Single pass: copy text up to the next "<...>" token, then look the token up.
+    while i < n:
+        lt = input_str.find("<", i)
+        if lt < 0:
+            break
+        gt = input_str.find(">", lt + 1)
+        if gt < 0:
+            break
+        if gt == lt + 1:
+            # "<>" is not a token; the "<" is typed as text.
+            codes.extend(_fragment_scancodes(input_str[i:gt]))
+            i = gt
             continue
-        if token.startswith("<") and token.endswith(">"):
-            key_name = token[1:-1].lower()
-            if key_name in SPECIAL_KEYCODES:
-                codes.extend(SPECIAL_KEYCODES[key_name])
-        else:
-            codes.extend(text_to_scancodes(token))
-    return codes
+        if lt > i:
+            codes.extend(_fragment_scancodes(input_str[i:lt]))
+        token = input_str[lt:gt + 1]
+        sequence = special.get(token)
+        if sequence is None:
+            # Only unusual capitalizations such as <eNtEr> need lowercasing.
+            sequence = special.get(token.lower(), ())
+        codes.extend(sequence)
+        i = gt + 1
+    codes.extend(_fragment_scancodes(input_str[i:]))
+    return tuple(codes)
+
+_parse_keys_input_cached = functools.lru_cache(maxsize=1024)(_parse_keys_input)
+
+def scancodes_to_hex(scancodes: Iterable[int]) -> List[str]:
+    """
+    Formats scancodes as the two-digit hex arguments expected by `VBoxManage keyboardputscancode`.
+
+    Args:
+        scancodes (Iterable[int]): The scancodes to format.
+
+    Returns:
+        List[str]: The hex strings, e.g. ["1e", "9e"].
+    """
+    return ["%02x" % sc for sc in scancodes]
+
+def chunk_scancodes(scancodes: Tuple[int, ...], size: int) -> Iterator[Tuple[int, ...]]:
+    """
+    Splits scancodes into batches of at most `size` codes, cutting only between complete keystrokes:
+    never after an 0xe0 prefix or while a key (e.g. Shift) is still held down.
+
+    Args:
+        scancodes (Tuple[int, ...]): The scancodes to split.
+        size (int): The maximum number of scancodes per batch.
+
+    Yields:
+        Tuple[int, ...]: The consecutive batches.
+    """
+    start = boundary = held = 0
+    for i, code in enumerate(scancodes):
+        if i - start == size:
+            # Batch is full: cut at the last key boundary, or hard if a single keystroke exceeds `size`.
+            cut = boundary if boundary > start else i
+            yield scancodes[start:cut]
+            start = cut
+        if code != 0xe0:
+            # Make codes press a key, break codes (high bit set) release one.
+            held = held - 1 if code & 0x80 else held + 1
+            if held <= 0:
+                held, boundary = 0, i + 1
+    if start < len(scancodes):
+        yield scancodes[start:]
+
+def parse_query(query: str) -> Dict[str, str]:
+    """
+    Parses a URL query string into a flat dictionary; for repeated keys the last value wins.
+
+    Args:
+        query (str): The raw query string.
+
+    Returns:
+        Dict[str, str]: The query parameters. Blank values are dropped.
+    """
+    return dict(urllib.parse.parse_qsl(query))
+
+def parse_machinereadable(output: str) -> Dict[str, str]:
+    """
+    Parses `VBoxManage ... --machinereadable` output into a dictionary.
 
-def run_vboxmanage_command(args: List[str]) -> subprocess.CompletedProcess:
+    Args:
+        output (str): The raw command output of key=value lines.
+
+    Returns:
+        Dict[str, str]: The parsed keys and values, with surrounding quotes removed.
+    """
+    return {
+        key.strip(): value.strip().strip('"')
+        for key, sep, value in (line.partition("=") for line in output.splitlines())
+        if sep
+    }
+
+def parse_vm_list(output: str) -> List[str]:
+    """
+    Extracts the VM names from `VBoxManage list vms` output.
+
+    Args:
+        output (str): The raw command output of `"NAME" {UUID}` lines.
+
+    Returns:
+        List[str]: The VM names in listing order.
+    """
+    vm_names = []
+    for line in output.splitlines():
+        start = line.find('"')
+        end = line.rfind('"')
+        if end > start + 1:
+            vm_names.append(line[start + 1:end])
+    return vm_names
+
+# Shared pool that runs VBoxManage processes; also caps how many run at the same time.
+MAX_VBOXMANAGE_PROCESSES = 16
+_VBOXMANAGE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=MAX_VBOXMANAGE_PROCESSES, thread_name_prefix="vboxmanage")
+
+def run_vboxmanage_async(args: List[str], text: bool = True) -> concurrent.futures.Future:
+    """
+    Starts a VBoxManage command on the shared worker pool.
+
+    Args:
+        args (List[str]): A list of arguments for the VBoxManage command.
+        text (bool): Decode stdout/stderr as text; pass False to capture binary output.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the subprocess.CompletedProcess, or raises
+        subprocess.CalledProcessError if the command fails.
+    """
+    cmd = ["VBoxManage"] + args
+    return _VBOXMANAGE_EXECUTOR.submit(
+        subprocess.run, cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=text)
+
+def run_vboxmanage_command(args: List[str], text: bool = True) -> subprocess.CompletedProcess:
     """
-    Executes a VBoxManage command with the given arguments.
+    Executes a VBoxManage command with the given arguments and waits for it to finish.
 
     Args:
         args (List[str]): A list of arguments for the VBoxManage command.
+        text (bool): Decode stdout/stderr as text; pass False to capture binary output.
 
     Returns:
         subprocess.CompletedProcess: The result of the command execution.
@@ -136,54 +322,521 @@ def run_vboxmanage_command(args: List[str]) -> subprocess.CompletedProcess:
     Raises:
         subprocess.CalledProcessError: If the command fails.
     """
-    cmd = ["VBoxManage"] + args
-    return subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return run_vboxmanage_async(args, text).result()
 
-class VirtualBoxHandler(http.server.BaseHTTPRequestHandler):
+class TTLCache:
     """
-    HTTP request handler for managing VirtualBox VMs via a web interface.
+    Thread-safe cache whose entries expire after a fixed number of seconds.
+    Concurrent misses for the same key share a single computation; failures are not cached.
     """
 
-    def safe_write(self, data: bytes) -> None:
+    def __init__(self, ttl: float) -> None:
         """
-        Safely writes data to the client, ignoring broken connections.
+        Args:
+            ttl (float): Seconds an entry stays valid.
+        """
+        self.ttl = ttl
+        self._entries: Dict[object, tuple] = {}
+        self._key_locks: Dict[object, list] = {}  # key -> [lock, number of threads using it]
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        # Caller holds self._lock. Expired entries are dropped rather than kept until overwritten.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] < self.ttl:
+            return entry
+        del self._entries[key]
+        return None
+
+    def _store(self, key, value) -> None:
+        # Caller holds self._lock. Also evicts expired entries of other keys, so values of keys
+        # that are never requested again (e.g. screenshots of a VM nobody views) do not linger.
+        now = time.monotonic()
+        for stale in [k for k, (stamp, _) in self._entries.items() if now - stamp >= self.ttl]:
+            del self._entries[stale]
+        self._entries[key] = (now, value)
+
+    def get(self, key, compute):
+        """
+        Returns the cached value for `key`, calling `compute()` to refresh it when expired.
 
         Args:
-            data (bytes): The data to write to the client.
+            key: The cache key.
+            compute: A callable producing the value; exceptions propagate to the caller.
         """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[1]
+            slot = self._key_locks.get(key)
+            if slot is None:
+                slot = self._key_locks[key] = [threading.Lock(), 0]
+            slot[1] += 1
         try:
-            self.wfile.write(data)
-        except (BrokenPipeError, ConnectionResetError):
-            print("Client disconnected before response completed.")
+            with slot[0]:
+                with self._lock:
+                    entry = self._lookup(key)
+                if entry is not None:
+                    return entry[1]
+                value = compute()
+                with self._lock:
+                    self._store(key, value)
+                return value
+        finally:
+            # Drop the per-key lock once no thread waits on it, so unknown keys do not pile up.
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._key_locks[key]
 
-    def do_GET(self) -> None:
+    def invalidate(self, key) -> None:
         """
-        Handles HTTP GET requests and routes them to the appropriate endpoint.
+        Drops the cached value for `key`, if any.
         """
-        parsed_url = urllib.parse.urlparse(self.path)
-        route = parsed_url.path
-        params = urllib.parse.parse_qs(parsed_url.query)
-
-        # Endpoint: List available VMs.
-        if route == "/list-vms":
-            try:
-                completed = run_vboxmanage_command(["list", "vms"])
-                output = completed.stdout
-                vm_names = re.findall(r'"([^"]+)"', output)
-                self.send_response(200)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                self.safe_write(json.dumps(vm_names).encode())
-            except subprocess.CalledProcessError as e:
-                self.send_response(500)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(f"Error listing VMs:\n{e.stderr}".encode())
-            return
+        with self._lock:
+            self._entries.pop(key, None)
+
+# Short-lived caches so polling clients share VBoxManage calls.
+_VM_LIST_CACHE = TTLCache(5.0)
+# Parsed `showvminfo` output per VM, shared by /vm-status and /vm-info.
+_VM_INFO_CACHE = TTLCache(1.0)
+
+def invalidate_vm_caches(vm_name: str) -> None:
+    """
+    Drops cached info of a VM, e.g. after its state was changed.
+
+    Args:
+        vm_name (str): The name of the VM.
+    """
+    _VM_INFO_CACHE.invalidate(vm_name)
+
+def _fetch_vminfo(vm_name: str) -> tuple:
+    """
+    Runs `showvminfo` for a VM and returns the parsed info together with its encoded JSON.
+    """
+    result = run_vboxmanage_command(["showvminfo", vm_name, "--machinereadable"])
+    info = parse_machinereadable(result.stdout)
+    return info, encode_json(info)
+
+def get_vminfo(vm_name: str) -> Dict[str, str]:
+    """
+    Returns the parsed machine-readable info of a VM, at most one second old.
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Returns:
+        Dict[str, str]: The VM info keys and values.
+
+    Raises:
+        subprocess.CalledProcessError: If VBoxManage fails.
+    """
+    return _VM_INFO_CACHE.get(vm_name, lambda: _fetch_vminfo(vm_name))[0]
+
+def get_vminfo_payload(vm_name: str) -> Tuple[bytes, Optional[bytes]]:
+    """
+    Returns the VM info of `get_vminfo` as prebuilt JSON bodies (see `encode_json`).
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Raises:
+        subprocess.CalledProcessError: If VBoxManage fails.
+    """
+    return _VM_INFO_CACHE.get(vm_name, lambda: _fetch_vminfo(vm_name))[1]
+
+class VBoxApiError(Exception):
+    """
+    Raised when a call through the VirtualBox SDK bindings fails.
+    Exposes the message as `stderr` so handlers can report it like a failed VBoxManage call.
+    """
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.stderr = message
+
+# VirtualBox SDK manager and IVirtualBox instance; None when the subprocess backend is used.
+VBOX_MANAGER = None
+VBOX = None
+
+# Every SDK call runs on this single thread. The COM/XPCOM bindings have to be initialized per thread,
+# and this way the manager and the cached sessions are only ever used from the thread that created them.
+_VBOX_API_THREAD = threading.local()
+_VBOX_API_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="vboxapi", initializer=lambda: setattr(_VBOX_API_THREAD, "active", True))
+
+def on_vbox_api_thread(func):
+    """
+    Decorator that runs an SDK call on the VirtualBox API thread and waits for its result.
+    Calls made on that thread already (e.g. nested SDK helpers) run directly.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_VBOX_API_THREAD, "active", False):
+            return func(*args, **kwargs)
+        return _VBOX_API_EXECUTOR.submit(func, *args, **kwargs).result()
+    return wrapper
+
+@on_vbox_api_thread
+def init_vbox_api() -> bool:
+    """
+    Connects to VirtualBox through the SDK bindings if they are installed.
+
+    Returns:
+        bool: True if the in-process API is available, False if VBoxManage is used instead.
+    """
+    global VBOX_MANAGER, VBOX
+    if vboxapi is None:
+        return False
+    try:
+        VBOX_MANAGER = vboxapi.VirtualBoxManager(None, None)
+        VBOX = VBOX_MANAGER.getVirtualBox()
+    except Exception as e:
+        print(f"VirtualBox API unavailable, falling back to VBoxManage: {e}")
+        VBOX_MANAGER = VBOX = None
+        return False
+    return True
+
+@on_vbox_api_thread
+def vbox_api_screenshot(vm_name: str) -> bytes:
+    """
+    Captures a PNG screenshot of the primary screen of a running VM through the SDK bindings.
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Returns:
+        bytes: The PNG image data.
+
+    Raises:
+        VBoxApiError: If the VM cannot be found or the screenshot fails.
+    """
+    try:
+        machine = VBOX.findMachine(vm_name)
+        session = VBOX_MANAGER.openMachineSession(machine)
+        try:
+            display = session.console.display
+            width, height = display.getScreenResolution(0)[:2]
+            png = display.takeScreenShotToArray(0, width, height, VBOX_MANAGER.constants.BitmapFormat_PNG)
+        finally:
+            VBOX_MANAGER.closeMachineSession(session)
+    except Exception as e:
+        raise VBoxApiError(str(e)) from e
+    return bytes(png)
+
+# Shared-lock sessions per VM, kept open across keystroke requests.
+_KEYBOARD_SESSIONS: Dict[str, object] = {}
+_KEYBOARD_SESSIONS_LOCK = threading.Lock()
+
+def _unlock_session(session) -> None:
+    """
+    Unlocks a VirtualBox session, ignoring sessions that are already gone.
+    """
+    try:
+        session.unlockMachine()
+    except Exception:
+        pass
+
+@on_vbox_api_thread
+def vbox_api_put_scancodes(vm_name: str, scancodes: List[int]) -> None:
+    """
+    Sends scancodes to a running VM through a cached shared session.
+
+    Args:
+        vm_name (str): The name of the VM.
+        scancodes (List[int]): The scancodes to send.
+
+    Raises:
+        VBoxApiError: If the session cannot be opened or the keyboard rejects the input.
+    """
+    with _KEYBOARD_SESSIONS_LOCK:
+        try:
+            session = _KEYBOARD_SESSIONS.get(vm_name)
+            if session is None:
+                machine = VBOX.findMachine(vm_name)
+                session = VBOX_MANAGER.getSessionObject(VBOX)
+                machine.lockMachine(session, VBOX_MANAGER.constants.LockType_Shared)
+                _KEYBOARD_SESSIONS[vm_name] = session
+            session.console.keyboard.putScancodes(scancodes)
+        except Exception as e:
+            # Drop the cached session so the next request starts from a fresh one.
+            stale = _KEYBOARD_SESSIONS.pop(vm_name, None)
+            if stale is not None:
+                _unlock_session(stale)
+            raise VBoxApiError(str(e)) from e
+
+@on_vbox_api_thread
+def vbox_api_list_vms() -> List[str]:
+    """
+    Lists the names of all accessible VMs through the SDK bindings.
+
+    Returns:
+        List[str]: The VM names.
+
+    Raises:
+        VBoxApiError: If the machine list cannot be read.
+    """
+    try:
+        return [machine.name for machine in VBOX_MANAGER.getArray(VBOX, "machines") if machine.accessible]
+    except Exception as e:
+        raise VBoxApiError(str(e)) from e
+
+@on_vbox_api_thread
+def vbox_api_is_running(vm_name: str) -> bool:
+    """
+    Checks through the SDK bindings whether a VM is running.
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Raises:
+        VBoxApiError: If the VM cannot be found.
+    """
+    try:
+        return VBOX.findMachine(vm_name).state == VBOX_MANAGER.constants.MachineState_Running
+    except Exception as e:
+        raise VBoxApiError(str(e)) from e
+
+@on_vbox_api_thread
+def release_keyboard_session(vm_name: str) -> None:
+    """
+    Releases the cached keyboard session for a VM, if any.
+
+    Args:
+        vm_name (str): The name of the VM.
+    """
+    with _KEYBOARD_SESSIONS_LOCK:
+        session = _KEYBOARD_SESSIONS.pop(vm_name, None)
+    if session is not None:
+        _unlock_session(session)
+
+# Placeholder image served when no screenshot can be taken.
+NO_IMAGE_SVG = b"<svg width=\"300\" height=\"200\" xmlns=\"http://www.w3.org/2000/svg\"><rect width=\"100%\" height=\"100%\" fill=\"#f0f0f0\"/><text x=\"50%\" y=\"50%\" text-anchor=\"middle\" dominant-baseline=\"middle\" font-family=\"Arial, sans-serif\" font-size=\"20\" fill=\"#888\">No Image available</text></svg>"
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Directory for fallback screenshot files; tmpfs avoids touching the disk.
+SCREENSHOT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+# Whether VBoxManage can write screenshots to our stdout pipe; cleared after the first capture that
+# produced no PNG, so later captures go straight to a temporary file.
+_PIPE_SCREENSHOTS = os.path.exists("/dev/stdout")
+
+def pipe_screenshot(vm_name: str) -> Optional[bytes]:
+    """
+    Captures a PNG screenshot by letting VBoxManage write it to our stdout pipe.
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Returns:
+        Optional[bytes]: The PNG image data, or None if this platform cannot capture through a pipe.
+
+    Raises:
+        subprocess.CalledProcessError: If VBoxManage fails to take the screenshot.
+    """
+    global _PIPE_SCREENSHOTS
+    if not _PIPE_SCREENSHOTS:
+        return None
+    completed = run_vboxmanage_command(["controlvm", vm_name, "screenshotpng", "/dev/stdout"], text=False)
+    if completed.stdout.startswith(PNG_SIGNATURE):
+        return completed.stdout
+    # This VBoxManage cannot write to the pipe; stop probing and use files from now on.
+    _PIPE_SCREENSHOTS = False
+    return None
+
+@contextlib.contextmanager
+def screenshot_file(vm_name: str) -> Iterator[str]:
+    """
+    Captures a PNG screenshot into a unique temporary file, removed when the block exits.
+    The file lives in memory-backed storage where available.
 
-        # Main HTML Frontend.
-        if route == "/":
-            html = """<!DOCTYPE html>
+    Args:
+        vm_name (str): The name of the VM.
+
+    Yields:
+        str: The path of the screenshot file.
+
+    Raises:
+        subprocess.CalledProcessError: If VBoxManage fails to take the screenshot.
+    """
+    fd, screenshot_path = tempfile.mkstemp(prefix=f"screenshot_{os.getpid()}_", suffix=".png", dir=SCREENSHOT_DIR)
+    os.close(fd)
+    try:
+        run_vboxmanage_command(["controlvm", vm_name, "screenshotpng", screenshot_path])
+        yield screenshot_path
+    finally:
+        if os.path.exists(screenshot_path):
+            os.remove(screenshot_path)
+
+def capture_screenshot(vm_name: str) -> bytes:
+    """
+    Captures a PNG screenshot of a running VM, using the VirtualBox API when available.
+    VBoxManage captures go through the stdout pipe, or through a temporary file where that is not possible.
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Returns:
+        bytes: The PNG image data.
+
+    Raises:
+        subprocess.CalledProcessError: If VBoxManage fails to take the screenshot.
+        VBoxApiError: If the VirtualBox API fails to take the screenshot.
+    """
+    if VBOX is not None:
+        return vbox_api_screenshot(vm_name)
+    content = pipe_screenshot(vm_name)
+    if content is not None:
+        return content
+    with screenshot_file(vm_name) as screenshot_path, open(screenshot_path, "rb") as f:
+        return f.read()
+
+# Recent captures per VM; concurrent requests for the same VM share one VBoxManage call.
+_SCREENSHOT_CACHE = TTLCache(0.5)
+
+def cached_screenshot(vm_name: str) -> bytes:
+    """
+    Returns a screenshot of a VM that is at most half a second old, capturing a new one if needed.
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Returns:
+        bytes: The PNG image data.
+
+    Raises:
+        subprocess.CalledProcessError: If VBoxManage fails to take the screenshot.
+        VBoxApiError: If the VirtualBox API fails to take the screenshot.
+    """
+    return _SCREENSHOT_CACHE.get(vm_name, lambda: capture_screenshot(vm_name))
+
+class ScreenshotStreamer:
+    """
+    Captures screenshots of one VM in a single background thread and shares every frame
+    with all connected stream clients, so N viewers cost one capture per interval.
+    The thread runs only while at least one client is subscribed.
+    """
+
+    def __init__(self, vm_name: str, interval: float = 1.0) -> None:
+        """
+        Args:
+            vm_name (str): The name of the VM to capture.
+            interval (float): Seconds between captures.
+        """
+        self.vm_name = vm_name
+        self.interval = interval
+        self._frame = None  # Latest PNG bytes, or None if the last capture failed.
+        self._seq = 0
+        self._clients = 0
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def subscribe(self) -> None:
+        """
+        Registers a client and starts the capture thread if it is not running.
+        """
+        with self._cond:
+            self._clients += 1
+            self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        # Caller holds self._cond.
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def unsubscribe(self) -> int:
+        """
+        Unregisters a client; the capture thread exits once no clients remain.
+
+        Returns:
+            int: The number of clients still subscribed.
+        """
+        with self._cond:
+            self._clients -= 1
+            return self._clients
+
+    def wait_for_frame(self, last_seq: int, timeout: Optional[float] = None):
+        """
+        Blocks until a frame newer than `last_seq` has been captured, or until `timeout` expires.
+        On timeout the capture thread is restarted if it has died, so clients never wait on it forever.
+
+        Args:
+            last_seq (int): Sequence number of the last frame the caller has seen.
+            timeout (Optional[float]): Seconds to wait at most; None waits indefinitely.
+
+        Returns:
+            tuple: The sequence number and the frame bytes (None if the capture failed).
+                The sequence number equals `last_seq` if the wait timed out.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq != last_seq, timeout):
+                self._ensure_thread()
+            return self._seq, self._frame
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    if self._clients <= 0:
+                        self._thread = None
+                        return
+                try:
+                    frame = cached_screenshot(self.vm_name)
+                except Exception:
+                    # Any failure (e.g. VBoxManage missing from PATH) is shown as the placeholder.
+                    frame = None
+                with self._cond:
+                    self._frame = frame
+                    self._seq += 1
+                    self._cond.notify_all()
+                time.sleep(self.interval)
+        finally:
+            with self._cond:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+# Seconds after which an unchanged frame is sent again on an open stream.
+STREAM_KEEPALIVE = 10.0
+# Seconds between checks whether a stream client has closed its connection.
+STREAM_DISCONNECT_CHECK = 1.0
+
+_SCREENSHOT_STREAMERS: Dict[str, ScreenshotStreamer] = {}
+_SCREENSHOT_STREAMERS_LOCK = threading.Lock()
+
+def subscribe_screenshot_stream(vm_name: str) -> ScreenshotStreamer:
+    """
+    Subscribes to the shared screenshot streamer of a VM, creating it if no client is watching yet.
+
+    Args:
+        vm_name (str): The name of the VM.
+
+    Returns:
+        ScreenshotStreamer: The streamer; pass it to `unsubscribe_screenshot_stream` when done.
+    """
+    with _SCREENSHOT_STREAMERS_LOCK:
+        streamer = _SCREENSHOT_STREAMERS.get(vm_name)
+        if streamer is None:
+            streamer = _SCREENSHOT_STREAMERS[vm_name] = ScreenshotStreamer(vm_name)
+        streamer.subscribe()
+        return streamer
+
+def unsubscribe_screenshot_stream(streamer: ScreenshotStreamer) -> None:
+    """
+    Unsubscribes from a screenshot streamer and forgets it once its last client has left.
+
+    Args:
+        streamer (ScreenshotStreamer): The streamer returned by `subscribe_screenshot_stream`.
+    """
+    with _SCREENSHOT_STREAMERS_LOCK:
+        if streamer.unsubscribe() <= 0 and _SCREENSHOT_STREAMERS.get(streamer.vm_name) is streamer:
+            del _SCREENSHOT_STREAMERS[streamer.vm_name]
+
+# Main HTML frontend, encoded once at import (plain and gzip-compressed).
+_INDEX_HTML = """<!DOCTYPE html>
 <html>
 <head>
   <meta charset="UTF-8">
@@ -347,9 +1000,13 @@ class VirtualBoxHandler(http.server.BaseHTTPRequestHandler):
           input.value = "";
         }
       });
+      var img = document.getElementById("screenshot");
+      img.onerror = retryScreenshotStream;
+      img.onload = function() { streamRetryDelay = 1000; };
       loadVMs();
-      setInterval(updateScreenshot, 1000);
       setInterval(loadVMs, 10000);
+      // A stream that simply ends (e.g. on a server restart) fires no error event in every browser.
+      setInterval(function() { updateScreenshot(true); }, 60000);
       createNotificationArea(); // Initialize the notification area
     };
 
@@ -420,10 +1077,18 @@ class VirtualBoxHandler(http.server.BaseHTTPRequestHandler):
           if (vm === current) { option.selected = true; }
           vmSelect.appendChild(option);
         });
+        if (streamStale) {
+          // The server was unreachable, so the stream is gone too: reopen it.
+          streamStale = false;
+          updateScreenshot(true);
+        }
         updateSelectedVM();
         updateVMStatusIcon();
       })
-      .catch(error => console.error("Error loading VMs:", error));
+      .catch(error => {
+        streamStale = true;
+        console.error("Error loading VMs:", error);
+      });
     }
 
     function getSelectedVM() {
@@ -439,10 +1104,30 @@ class VirtualBoxHandler(http.server.BaseHTTPRequestHandler):
       }
     }
 
-    // Update the screenshot shown (used for live view).
-    function updateScreenshot() {
+    var streamRetryDelay = 1000;
+    var streamRetryTimer = null;
+    var streamStale = false;
+
+    // Point the live view at the server-pushed screenshot stream of the selected VM.
+    // With reconnect set, a new connection is opened even if the VM did not change.
+    function updateScreenshot(reconnect) {
       var vm = getSelectedVM();
-      document.getElementById("screenshot").src = "/screenshot.png?vm=" + encodeURIComponent(vm) + "&ts=" + new Date().getTime();
+      var stream = "/screenshot.mjpeg?vm=" + encodeURIComponent(vm);
+      var img = document.getElementById("screenshot");
+      if (!reconnect && img.dataset.stream === stream) { return; }
+      img.dataset.stream = stream;
+      // Timestamp so the browser opens a new connection instead of reusing the ended stream.
+      img.src = stream + "&ts=" + new Date().getTime();
+    }
+
+    // Reopen a failed stream, backing off up to 30 seconds between attempts.
+    function retryScreenshotStream() {
+      if (streamRetryTimer) return;
+      streamRetryTimer = setTimeout(function() {
+        streamRetryTimer = null;
+        updateScreenshot(true);
+      }, streamRetryDelay);
+      streamRetryDelay = Math.min(streamRetryDelay * 2, 30000);
     }
 
     // NEW: Download screenshot function.
@@ -547,180 +1232,411 @@ class VirtualBoxHandler(http.server.BaseHTTPRequestHandler):
   </div>
 </body>
 </html>
-"""
-            self.send_response(200)
-            self.send_header("Content-type", "text/html")
+""".encode("utf-8")
+_INDEX_HTML_GZ = gzip.compress(_INDEX_HTML)
+# Weak validator, since the same ETag covers both the plain and the gzip representation.
+_INDEX_ETAG = 'W/"' + hashlib.md5(_INDEX_HTML, usedforsecurity=False).hexdigest() + '"'
+
+# Responses smaller than this are sent uncompressed; gzip overhead would outweigh the savings.
+GZIP_MIN_SIZE = 512
+
+def encode_json(obj) -> Tuple[bytes, Optional[bytes]]:
+    """
+    Encodes an object as compact JSON, plus a gzip-compressed copy if it is large enough to benefit.
+    Cached results can then be served as-is with no JSON or compression work per request.
+
+    Args:
+        obj: The JSON-serializable object.
+
+    Returns:
+        Tuple[bytes, Optional[bytes]]: The JSON body and its gzip copy (None for small bodies).
+    """
+    body = json.dumps(obj, separators=(",", ":")).encode()
+    return body, gzip.compress(body) if len(body) >= GZIP_MIN_SIZE else None
+
+# Scancodes per `keyboardputscancode` invocation, and the most accepted per request.
+SCANCODE_CHUNK = 256
+MAX_SCANCODES = 64 * 1024
+# Longest `keys` value accepted, checked before parsing. No character or token yields more than
+# 4 scancodes per input character, so this also enforces MAX_SCANCODES.
+MAX_KEYS_LENGTH = MAX_SCANCODES // 4
+
+# The two possible /vm-status bodies, encoded once.
+_STATUS_PAYLOADS = {running: encode_json({"running": running})[0] for running in (False, True)}
+
+class VirtualBoxHandler(http.server.BaseHTTPRequestHandler):
+    """
+    HTTP request handler for managing VirtualBox VMs via a web interface.
+    Uses HTTP/1.1 so polling clients can reuse one connection; every response carries a Content-Length.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Close idle keep-alive connections so they do not pin a worker thread forever.
+    timeout = 60
+    # Send small responses without Nagle delay, and collect headers and body in one buffer
+    # so each response goes out in as few send() calls as possible (flushed in safe_write).
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def safe_write(self, data: bytes) -> None:
+        """
+        Safely writes data to the client, ignoring broken connections.
+
+        Args:
+            data (bytes): The data to write to the client.
+        """
+        try:
+            self.wfile.write(data)
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self._drop_output()
+            print("Client disconnected before response completed.")
+
+    def _drop_output(self) -> None:
+        """
+        Closes the connection after the client went away and discards the unsent output.
+        The buffered writer keeps unsent bytes, so any later flush would fail again.
+        """
+        self.close_connection = True
+        wfile, self.wfile = self.wfile, io.BytesIO()
+        try:
+            wfile.close()
+        except OSError:
+            pass
+
+    def handle(self) -> None:
+        """
+        Handles requests until the connection closes; a client resetting an idle connection ends it quietly.
+        """
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            self._drop_output()
+
+    def send_content(self, code: int, content_type: str, body: bytes, headers: Dict[str, str] = None,
+                     gzip_body: Optional[bytes] = None) -> None:
+        """
+        Sends a complete response with a Content-Length header, so the connection can be kept alive.
+
+        Args:
+            code (int): The HTTP status code.
+            content_type (str): The value of the Content-type header.
+            body (bytes): The response body.
+            headers (Dict[str, str]): Optional additional headers.
+            gzip_body (Optional[bytes]): Precompressed body, sent instead if the client accepts gzip.
+        """
+        if gzip_body is not None:
+            headers = dict(headers or {}, Vary="Accept-Encoding")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip_body
+                headers["Content-Encoding"] = "gzip"
+        self.send_response(code)
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if headers:
+            for name, value in headers.items():
+                self.send_header(name, value)
+        self.end_headers()
+        self.safe_write(body)
+
+    def _client_gone(self) -> bool:
+        """
+        Checks without blocking whether the client has closed the connection (EOF or reset).
+        Lets long-running responses stop early even while they have nothing to write.
+        """
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
+
+    def _vm_param(self, params: Dict[str, str]) -> Optional[str]:
+        """
+        Returns the validated `vm` query parameter, or responds with 400 and returns None,
+        so bad names are rejected before any VBoxManage process is started.
+
+        Args:
+            params (Dict[str, str]): The parsed query parameters.
+        """
+        vm_name = params.get("vm", "myVM")
+        if _VM_NAME_OK.match(vm_name):
+            return vm_name
+        self.send_content(400, "text/plain", b"Invalid VM name.")
+        return None
+
+    def _route_not_found(self, params: Dict[str, str]) -> None:
+        """
+        Responds with 404 Not Found.
+        """
+        self.send_content(404, "text/plain", b"Route not found.\n")
+
+    def _route_list_vms(self, params: Dict[str, str]) -> None:
+        """
+        Lists available VMs.
+        """
+        def fetch() -> Tuple[bytes, Optional[bytes]]:
+            if VBOX is not None:
+                return encode_json(vbox_api_list_vms())
+            completed = run_vboxmanage_command(["list", "vms"])
+            return encode_json(parse_vm_list(completed.stdout))
+        try:
+            body, gzip_body = _VM_LIST_CACHE.get(None, fetch)
+            self.send_content(200, "application/json", body, gzip_body=gzip_body)
+        except (subprocess.CalledProcessError, VBoxApiError) as e:
+            self.send_content(500, "text/plain", f"Error listing VMs:\n{e.stderr}".encode())
+
+    def _route_index(self, params: Dict[str, str]) -> None:
+        """
+        Serves the main HTML frontend, answering 304 Not Modified when the client's copy is current.
+        """
+        cache_headers = {"ETag": _INDEX_ETAG, "Cache-Control": "public, max-age=60"}
+        if_none_match = self.headers.get("If-None-Match", "")
+        if if_none_match == "*" or _INDEX_ETAG in (tag.strip() for tag in if_none_match.split(",")):
+            self.send_response(304)
+            for name, value in cache_headers.items():
+                self.send_header(name, value)
             self.end_headers()
-            self.safe_write(html.encode())
+            self.safe_write(b"")
             return
+        self.send_content(200, "text/html; charset=utf-8", _INDEX_HTML, cache_headers, gzip_body=_INDEX_HTML_GZ)
 
-        # Endpoint: Control VM actions.
-        if route == "/control-vm":
-            vm_name = params.get("vm", ["myVM"])[0]
-            action = params.get("action", [""])[0].lower()
-            if action not in ["start", "poweroff", "savestate"]:
-                self.send_response(400)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(b"Invalid VM action requested.")
-                return
-            try:
-                if action == "start":
-                    run_vboxmanage_command(["startvm", vm_name, "--type", "headless"])
-                else:
-                    run_vboxmanage_command(["controlvm", vm_name, action])
-                self.send_response(200)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(f"Action '{action}' executed on VM '{vm_name}'.".encode())
-            except subprocess.CalledProcessError as e:
-                self.send_response(500)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(f"Error executing action '{action}' on VM '{vm_name}': {e.stderr}".encode())
+    def _route_control_vm(self, params: Dict[str, str]) -> None:
+        """
+        Starts, powers off or saves the state of a VM.
+        """
+        vm_name = self._vm_param(params)
+        if vm_name is None:
             return
+        action = params.get("action", "").lower()
+        if action not in ["start", "poweroff", "savestate"]:
+            self.send_content(400, "text/plain", b"Invalid VM action requested.")
+            return
+        try:
+            if action == "start":
+                run_vboxmanage_command(["startvm", vm_name, "--type", "headless"])
+            else:
+                release_keyboard_session(vm_name)
+                run_vboxmanage_command(["controlvm", vm_name, action])
+            invalidate_vm_caches(vm_name)
+            self.send_content(200, "text/plain", f"Action '{action}' executed on VM '{vm_name}'.".encode())
+        except subprocess.CalledProcessError as e:
+            self.send_content(500, "text/plain",
+                              f"Error executing action '{action}' on VM '{vm_name}': {e.stderr}".encode())
 
-        # Endpoint: Fetch screenshot.
-        if route == "/screenshot.png":
-            vm_name = params.get("vm", ["myVM"])[0]
-            screenshot_path = "screenshot.png"
-            try:
-                run_vboxmanage_command(["controlvm", vm_name, "screenshotpng", screenshot_path])
-                self.send_response(200)
-                self.send_header("Content-type", "image/png")
-                # NEW: Check if download parameter is present, and add content-disposition.
-                if params.get("download", ["0"])[0] == "1":
-                    self.send_header("Content-Disposition", "attachment; filename=\"screenshot.png\"")
-                self.end_headers()
-                with open(screenshot_path, "rb") as f:
-                    content = f.read()
-                self.safe_write(content)
-            except subprocess.CalledProcessError:
-                self.send_response(200)
-                self.send_header("Content-type", "image/svg+xml")
-                if params.get("download", ["0"])[0] == "1":
-                    self.send_header("Content-Disposition", "attachment; filename=\"screenshot.svg\"")
-                self.end_headers()
-                self.safe_write(b"<svg width=\"300\" height=\"200\" xmlns=\"http://www.w3.org/2000/svg\"><rect width=\"100%\" height=\"100%\" fill=\"#f0f0f0\"/><text x=\"50%\" y=\"50%\" text-anchor=\"middle\" dominant-baseline=\"middle\" font-family=\"Arial, sans-serif\" font-size=\"20\" fill=\"#888\">No Image available</text></svg>")
+    def _route_screenshot(self, params: Dict[str, str]) -> None:
+        """
+        Returns a single screenshot of a VM, optionally as a download.
+        """
+        vm_name = self._vm_param(params)
+        if vm_name is None:
             return
+        download = params.get("download") == "1"
+        try:
+            # NEW: Check if download parameter is present, and add content-disposition.
+            headers = {"Content-Disposition": "attachment; filename=\"screenshot.png\""} if download else None
+            self.send_content(200, "image/png", cached_screenshot(vm_name), headers)
+        except (subprocess.CalledProcessError, VBoxApiError):
+            headers = {"Content-Disposition": "attachment; filename=\"screenshot.svg\""} if download else None
+            self.send_content(200, "image/svg+xml", NO_IMAGE_SVG, headers)
 
-        # Endpoint: Send keystrokes.
-        if route == "/send-keystrokes":
-            vm_name = params.get("vm", ["myVM"])[0]
-            if "keys" not in params:
-                self.send_response(400)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(b"Missing required query parameter 'keys'.")
-                return
-            keys_input = params["keys"][0]
-            scancodes = parse_keys_input(keys_input)
-            if not scancodes:
-                self.send_response(400)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(b"Unable to convert input string to scancodes.")
-                return
-            try:
-                run_vboxmanage_command(["controlvm", vm_name, "keyboardputscancode"] + scancodes)
-                self.send_response(200)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(f"Keystrokes sent to VM '{vm_name}' successfully.".encode())
-            except subprocess.CalledProcessError as e:
-                self.send_response(500)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.safe_write(f"Error sending keystrokes to VM '{vm_name}': {e.stderr}".encode())
+    def _route_screenshot_stream(self, params: Dict[str, str]) -> None:
+        """
+        Streams screenshots of a VM as a multipart/x-mixed-replace response.
+        """
+        vm_name = self._vm_param(params)
+        if vm_name is None:
             return
+        # The stream has no known length, so this connection cannot be reused afterwards.
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-type", "multipart/x-mixed-replace; boundary=frame")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        streamer = subscribe_screenshot_stream(vm_name)
+        try:
+            self.wfile.flush()
+            seq, last_frame, last_sent = 0, None, 0.0
+            while True:
+                seq, frame = streamer.wait_for_frame(seq, STREAM_DISCONNECT_CHECK)
+                if self._client_gone():
+                    break
+                # Skip unchanged frames, but resend now and then so a closed connection is noticed.
+                if last_sent and frame == last_frame and time.monotonic() - last_sent < STREAM_KEEPALIVE:
+                    continue
+                last_frame, last_sent = frame, time.monotonic()
+                if frame is None:
+                    content_type, body = "image/svg+xml", NO_IMAGE_SVG
+                else:
+                    content_type, body = "image/png", frame
+                self.wfile.write(
+                    f"--frame\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                    + body + b"\r\n"
+                )
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self._drop_output()
+        finally:
+            unsubscribe_screenshot_stream(streamer)
 
-        # Endpoint: Return VM status.
-        if route == "/vm-status":
-            vm_name = params.get("vm", ["myVM"])[0]
-            try:
-                result = run_vboxmanage_command(["showvminfo", vm_name, "--machinereadable"])
-                running = 'VMState="running"' in result.stdout
-                self.send_response(200)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                self.safe_write(json.dumps({"running": running}).encode())
-            except subprocess.CalledProcessError as e:
-                self.send_response(500)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                self.safe_write(json.dumps({"error": e.stderr}).encode())
+    def _route_send_keystrokes(self, params: Dict[str, str]) -> None:
+        """
+        Sends keystrokes to a VM.
+        """
+        vm_name = self._vm_param(params)
+        if vm_name is None:
+            return
+        if "keys" not in params:
+            self.send_content(400, "text/plain", b"Missing required query parameter 'keys'.")
             return
+        keys_input = params["keys"]
+        if len(keys_input) > MAX_KEYS_LENGTH:
+            self.send_content(414, "text/plain", f"Input exceeds {MAX_KEYS_LENGTH} characters.".encode())
+            return
+        scancodes = parse_keys_input(keys_input)
+        if not scancodes:
+            self.send_content(400, "text/plain", b"Unable to convert input string to scancodes.")
+            return
+        try:
+            if VBOX is not None:
+                vbox_api_put_scancodes(vm_name, list(scancodes))
+            else:
+                # Chunked so long pastes never approach the OS argument-length limit.
+                for batch in chunk_scancodes(scancodes, SCANCODE_CHUNK):
+                    run_vboxmanage_command(["controlvm", vm_name, "keyboardputscancode"] + scancodes_to_hex(batch))
+            self.send_content(200, "text/plain", f"Keystrokes sent to VM '{vm_name}' successfully.".encode())
+        except (subprocess.CalledProcessError, VBoxApiError) as e:
+            self.send_content(500, "text/plain", f"Error sending keystrokes to VM '{vm_name}': {e.stderr}".encode())
 
-        # Endpoint: Return detailed VM info.
-        if route == "/vm-info":
-            vm_name = params.get("vm", ["myVM"])[0]
-            try:
-                result = run_vboxmanage_command(["showvminfo", vm_name, "--machinereadable"])
-                info_lines = result.stdout.splitlines()
-                info = {}
-                for line in info_lines:
-                    if "=" in line:
-                        key, value = line.split("=", 1)
-                        key = key.strip()
-                        value = value.strip().strip('"')
-                        info[key] = value
-                self.send_response(200)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                self.safe_write(json.dumps(info, indent=2).encode())
-            except subprocess.CalledProcessError as e:
-                self.send_response(500)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                self.safe_write(json.dumps({"error": e.stderr}).encode())
+    def _route_vm_status(self, params: Dict[str, str]) -> None:
+        """
+        Returns whether a VM is running.
+        """
+        vm_name = self._vm_param(params)
+        if vm_name is None:
             return
+        try:
+            if VBOX is not None:
+                running = vbox_api_is_running(vm_name)
+            else:
+                running = get_vminfo(vm_name).get("VMState") == "running"
+            self.send_content(200, "application/json", _STATUS_PAYLOADS[running])
+        except (subprocess.CalledProcessError, VBoxApiError) as e:
+            self.send_content(500, "application/json", encode_json({"error": e.stderr})[0])
 
-        # 404 Not Found.
-        self.send_response(404)
-        self.send_header("Content-type", "text/plain")
-        self.end_headers()
-        self.safe_write(b"Route not found.\n")
+    def _route_vm_info(self, params: Dict[str, str]) -> None:
+        """
+        Returns detailed VM info; `pretty=1` returns indented JSON for reading by hand.
+        """
+        vm_name = self._vm_param(params)
+        if vm_name is None:
+            return
+        try:
+            if params.get("pretty") == "1":
+                self.send_content(200, "application/json", json.dumps(get_vminfo(vm_name), indent=2).encode())
+                return
+            body, gzip_body = get_vminfo_payload(vm_name)
+            self.send_content(200, "application/json", body, gzip_body=gzip_body)
+        except subprocess.CalledProcessError as e:
+            self.send_content(500, "application/json", encode_json({"error": e.stderr})[0])
+
+    # Route table: one dict lookup per request instead of a chain of comparisons.
+    _ROUTES = {
+        "/list-vms": _route_list_vms,
+        "/": _route_index,
+        "/control-vm": _route_control_vm,
+        "/screenshot.png": _route_screenshot,
+        "/screenshot.mjpeg": _route_screenshot_stream,
+        "/send-keystrokes": _route_send_keystrokes,
+        "/vm-status": _route_vm_status,
+        "/vm-info": _route_vm_info,
+    }
+
+    def do_GET(self) -> None:
+        """
+        Handles HTTP GET requests and routes them to the appropriate endpoint.
+        """
+        parsed_url = urllib.parse.urlparse(self.path)
+        handler = self._ROUTES.get(parsed_url.path, VirtualBoxHandler._route_not_found)
+        slots = self.server.request_slots
+        # Streams only relay frames of the shared capture thread, so they do not take a worker slot.
+        if slots is None or handler is VirtualBoxHandler._route_screenshot_stream:
+            handler(self, parse_query(parsed_url.query))
+            return
+        with slots:
+            handler(self, parse_query(parsed_url.query))
+
+class VirtualBoxHTTPServer(http.server.ThreadingHTTPServer):
+    """
+    Threaded HTTP server that handles each connection in its own thread so slow VBoxManage
+    calls do not block other clients. Optionally caps the number of requests processed at once.
+    """
+
+    # Request threads must not keep the process alive on Ctrl-C (e.g. threads serving open streams).
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, max_workers: int = 0, bind_and_activate: bool = True) -> None:
+        """
+        Args:
+            server_address: The (host, port) tuple to bind to.
+            handler_class: The request handler class.
+            max_workers (int): Maximum number of requests processed at once; 0 means unlimited.
+            bind_and_activate (bool): Bind and listen immediately; pass False to bind later.
+        """
+        # Taken by the handler thread per request, never per connection and never in the accept loop,
+        # so idle keep-alive connections do not hold a slot.
+        self.request_slots = threading.BoundedSemaphore(max_workers) if max_workers > 0 else None
+        super().__init__(server_address, handler_class, bind_and_activate)
 
 # Start the server on the specified port.
-def run_server(start_port: int, max_tries: int = 10) -> None:
+def run_server(start_port: int, max_tries: int = 10, workers: int = 0) -> None:
     """
     Starts the HTTP server on the specified port, trying multiple ports if the initial one is unavailable.
 
     Args:
         start_port (int): The starting port for the server.
         max_tries (int): The maximum number of ports to try.
+        workers (int): Maximum number of requests processed at once; 0 means unlimited.
 
     Raises:
         OSError: If the server cannot start after trying the specified number of ports.
     """
+    # Create the server once and only retry the bind, instead of rebuilding it for every port.
+    httpd = VirtualBoxHTTPServer(("", start_port), VirtualBoxHandler, max_workers=workers, bind_and_activate=False)
     for i in range(max_tries):
         port = start_port + i
+        httpd.server_address = ("", port)
         try:
-            server_address = ("", port)
-            httpd = http.server.HTTPServer(server_address, VirtualBoxHandler)
-            print(f"Server started on port {port}.")
-            try:
-                httpd.serve_forever()
-            except KeyboardInterrupt:
-                print("Server is shutting down.")
-                httpd.server_close()
+            httpd.server_bind()
+            httpd.server_activate()
             break
         except OSError as e:
             if e.errno == socket.errno.EADDRINUSE:
                 print(f"Port {port} is in use, trying next...")
             else:
+                httpd.server_close()
                 raise
     else:
+        httpd.server_close()
         print(f"Could not start server after trying {max_tries} ports.")
+        return
+    print(f"Server started on port {port}.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("Server is shutting down.")
+    finally:
+        httpd.server_close()
 
 def cleanup():
     """
-    Deletes the screenshot.png file if it exists.
+    Releases cached VM sessions and deletes leftover screenshot files of this process.
     """
-    screenshot_path = "screenshot.png"
-    if os.path.exists(screenshot_path):
+    for vm_name in list(_KEYBOARD_SESSIONS):
+        release_keyboard_session(vm_name)
+    for screenshot_path in glob.glob(os.path.join(SCREENSHOT_DIR, f"screenshot_{os.getpid()}_*.png")):
         os.remove(screenshot_path)
-        print("Cleanup: Deleted screenshot.png")
+        print(f"Cleanup: Deleted {screenshot_path}")
 
 def signal_handler(sig, frame):
     """
@@ -737,6 +1653,11 @@ signal.signal(signal.SIGTERM, signal_handler)  # Handle termination signals
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Start the VirtualBox Web Control Panel.")
     parser.add_argument("--port", type=int, default=9091, help="Starting port for the server")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Maximum number of requests processed in parallel (0 = unlimited); "
+                             "idle connections and screenshot streams do not count")
     args = parser.parse_args()
-    run_server(args.port)
+    if init_vbox_api():
+        print("Using the VirtualBox API for VM listing, status, screenshots and keystrokes.")
+    run_server(args.port, workers=args.workers)
     cleanup()  # Ensure cleanup is called after the server stops